@@ -0,0 +1,395 @@
+import asyncio
+import logging
+import os
+import signal
+import sys
+import telebot
+from aiohttp import web
+from telebot.async_telebot import AsyncTeleBot
+from telebot.asyncio_helper import ApiTelegramException
+from config import BOT_TOKEN, ADMIN_CHAT_ID, DB_NAME, SCAN_INTERVAL
+from config import NOTIFY_RATE_LIMIT, NOTIFY_MAX_RETRIES
+from database import AsyncDatabase
+from parser import AsyncPirateSwapParser
+from filters import ItemFilter, SearchIndex
+import ui
+
+# ==================== LOGGING ====================
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout),
+        logging.FileHandler('bot.log')
+    ]
+)
+logger = logging.getLogger(__name__)
+
+# Verify tokens
+if not BOT_TOKEN:
+    logger.error("❌ BOT_TOKEN is not set in environment variables!")
+    exit(1)
+if not ADMIN_CHAT_ID:
+    logger.error("❌ ADMIN_CHAT_ID is not set in environment variables!")
+    exit(1)
+logger.info("✅ BOT_TOKEN loaded successfully")
+logger.info(f"✅ ADMIN_CHAT_ID loaded: {ADMIN_CHAT_ID}")
+
+# Initialize bot
+bot = AsyncTeleBot(BOT_TOKEN, parse_mode="HTML")
+logger.info("✅ Async Telegram bot initialized")
+
+# Initialize database and parser
+try:
+    db = AsyncDatabase(DB_NAME)
+    logger.info("✅ Async database initialized")
+    search_index = SearchIndex.from_searches(db.db.get_all_search_rows())
+    logger.info(f"✅ Search index built: {len(search_index)} searches")
+except Exception as e:
+    logger.error(f"❌ Database init failed: {e}")
+    exit(1)
+
+parser = AsyncPirateSwapParser()
+logger.info("✅ Async PirateSwap parser initialized")
+
+# State management for user conversations
+user_states = ui.ConversationState()
+
+PORT = int(os.getenv('PORT', 5000))
+WEBHOOK_URL = os.getenv('WEBHOOK_URL')
+logger.info(f"✅ PORT: {PORT}")
+
+# ==================== WEB SERVER ====================
+
+async def health(request):
+    return web.json_response({'status': 'ok'})
+
+async def root(request):
+    return web.json_response({'status': 'Bot is running'})
+
+async def webhook(request):
+    json_string = await request.text()
+    logger.info(f"📩 Incoming webhook update: {json_string}")
+    update = telebot.types.Update.de_json(json_string)
+    await bot.process_new_updates([update])
+    logger.info("✅ Webhook update processed")
+    return web.Response(status=200)
+
+def create_web_app():
+    app = web.Application()
+    app.router.add_get('/health', health)
+    app.router.add_get('/', root)
+    app.router.add_post('/webhook', webhook)
+    return app
+
+# ==================== BOT MESSAGE HANDLERS ====================
+
+@bot.message_handler(commands=['start'])
+async def start_command(message):
+    user_id = message.chat.id
+    logger.info(f"🔥 /START COMMAND FROM USER {user_id}")
+    try:
+        msg = await bot.send_message(user_id, ui.WELCOME_TEXT, reply_markup=ui.get_main_keyboard())
+        logger.info(f"✅ Start message sent to user {user_id}, message_id: {msg.message_id}")
+    except Exception as e:
+        logger.error(f"❌ Error sending start message to {user_id}: {e}", exc_info=True)
+
+@bot.message_handler(func=lambda message: message.text == ui.BTN_START)
+async def start_button(message):
+    await start_command(message)
+
+@bot.message_handler(func=lambda message: message.text == ui.BTN_ADD_SKIN)
+async def add_skin_start(message):
+    user_id = message.chat.id
+    logger.info(f"📌 Add skin button pressed by user {user_id}")
+    user_states.start_add(user_id)
+    try:
+        await bot.send_message(user_id, ui.ASK_SKIN_NAME_TEXT, reply_markup=telebot.types.ForceReply())
+        logger.info(f"✅ Skin name request sent to user {user_id}")
+    except Exception as e:
+        logger.error(f"❌ Error requesting skin name from {user_id}: {e}")
+        user_states.reset(user_id)
+
+@bot.message_handler(func=lambda message: user_states.is_waiting_skin_name(message.chat.id))
+async def process_skin_name(message):
+    user_id = message.chat.id
+    logger.info(f"📝 Skin name input from user {user_id}: '{message.text}', state: {user_states.get(user_id)}")
+    skin_name = ui.clean_skin_name(message.text)
+    if not skin_name:
+        logger.warning(f"❌ Invalid skin name length from {user_id}")
+        await bot.send_message(user_id, ui.SKIN_NAME_TOO_SHORT_TEXT)
+        return
+    user_states.set_skin_name(user_id, skin_name)
+    try:
+        await bot.send_message(user_id, ui.charm_prompt_text(skin_name), reply_markup=ui.get_charm_keyboard())
+        logger.info(f"✅ Charm choice prompt sent to user {user_id}")
+    except Exception as e:
+        logger.error(f"❌ Error sending charm choice to {user_id}: {e}")
+        user_states.reset(user_id)
+
+@bot.callback_query_handler(func=ui.is_charm_callback)
+async def process_charm_choice(call):
+    user_id = call.message.chat.id
+    call_id = call.id
+    logger.info(f"📌 Charm choice callback from user {user_id}: {call.data}, state: {user_states.get(user_id)}")
+    if not user_states.is_waiting_charm_choice(user_id):
+        logger.warning(f"❌ Invalid state for user {user_id}")
+        await bot.answer_callback_query(call_id, ui.SESSION_EXPIRED_ALERT, show_alert=True)
+        return
+
+    charm_required = ui.parse_charm_choice(call)
+    skin_name = user_states.finish(user_id)
+
+    if search_index.has_subscription(user_id, skin_name, charm_required):
+        logger.warning(f"❌ Equivalent search already exists for user {user_id}: {skin_name}")
+        await bot.answer_callback_query(call_id, ui.SEARCH_EXISTS_ALERT, show_alert=True)
+        return
+
+    try:
+        search_id = await db.add_search(user_id, skin_name, charm_required)
+        if search_id:
+            search_index.add(search_id, user_id, skin_name, charm_required)
+            await bot.send_message(
+                user_id, ui.search_added_text(skin_name, charm_required), reply_markup=ui.get_main_keyboard()
+            )
+            logger.info(f"✅ Search added for user {user_id}: {skin_name} (charm: {charm_required})")
+            await bot.answer_callback_query(call_id, ui.SEARCH_ADDED_ALERT, show_alert=False)
+        else:
+            logger.warning(f"❌ Failed to add search for user {user_id}")
+            await bot.answer_callback_query(call_id, ui.SEARCH_EXISTS_ALERT, show_alert=True)
+    except Exception as e:
+        logger.error(f"❌ Error adding search for {user_id}: {e}", exc_info=True)
+        await bot.answer_callback_query(call_id, ui.error_text(e), show_alert=True)
+
+@bot.message_handler(func=lambda message: message.text == ui.BTN_MY_SEARCHES)
+async def show_searches(message):
+    user_id = message.chat.id
+    logger.info(f"📌 Show searches button pressed by user {user_id}")
+    try:
+        searches = await db.get_user_searches(user_id)
+        logger.info(f"📋 Found {len(searches)} searches for user {user_id}")
+        if not searches:
+            await bot.send_message(user_id, ui.NO_SEARCHES_TEXT, reply_markup=ui.get_main_keyboard())
+            return
+        response, markup = ui.format_searches(searches)
+        await bot.send_message(user_id, response, reply_markup=markup)
+        logger.info(f"✅ Searches list sent to user {user_id}")
+    except Exception as e:
+        logger.error(f"❌ Error showing searches for {user_id}: {e}", exc_info=True)
+        await bot.send_message(user_id, ui.error_text(e))
+
+@bot.callback_query_handler(func=ui.is_delete_callback)
+async def delete_search(call):
+    user_id = call.message.chat.id
+    call_id = call.id
+    try:
+        search_id = ui.parse_delete_id(call)
+        logger.info(f"🗑 Delete search request from user {user_id}, search_id: {search_id}")
+        if await db.delete_search(search_id):
+            search_index.remove(search_id)
+            await bot.answer_callback_query(call_id, ui.SEARCH_DELETED_ALERT, show_alert=False)
+            await bot.edit_message_text(ui.SEARCH_DELETED_TEXT, user_id, call.message.message_id)
+            logger.info(f"✅ Search {search_id} deleted for user {user_id}")
+        else:
+            logger.warning(f"❌ Failed to delete search {search_id} for user {user_id}")
+            await bot.answer_callback_query(call_id, ui.DELETE_FAILED_ALERT, show_alert=True)
+    except Exception as e:
+        logger.error(f"❌ Error deleting search: {e}", exc_info=True)
+        await bot.answer_callback_query(call_id, ui.error_text(e), show_alert=True)
+
+@bot.message_handler(func=lambda message: True)
+async def default_handler(message):
+    user_id = message.chat.id
+    if user_id in user_states:
+        logger.info(f"default_handler SKIP: user {user_id} in dialogue: {user_states.get(user_id)}")
+        return
+    text = message.text
+    logger.info(f"📝 Default message from user {user_id}: '{text}'")
+    try:
+        await bot.send_message(user_id, ui.DEFAULT_TEXT, reply_markup=ui.get_main_keyboard())
+    except Exception as e:
+        logger.error(f"❌ Error in default handler: {e}")
+
+# ==================== SCANNER ====================
+
+# Число параллельных отправителей уведомлений
+NOTIFY_CONCURRENCY = 20
+
+class RateLimiter:
+    """Spaces calls to at most `rate` per second across all tasks on the loop"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self.next_slot = 0.0
+
+    async def wait(self):
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self.next_slot)
+        self.next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def pause(self, seconds):
+        """Hold back every sender for `seconds` (Telegram flood control)"""
+        now = asyncio.get_running_loop().time()
+        self.next_slot = max(self.next_slot, now + seconds)
+
+notify_limiter = RateLimiter(NOTIFY_RATE_LIMIT)
+
+async def send_notification(user_id, text):
+    for attempt in range(1, NOTIFY_MAX_RETRIES + 1):
+        await notify_limiter.wait()
+        try:
+            return await bot.send_message(user_id, text)
+        except ApiTelegramException as e:
+            if e.error_code != 429 or attempt == NOTIFY_MAX_RETRIES:
+                raise
+            retry_after = (e.result_json or {}).get('parameters', {}).get('retry_after', 1)
+            logger.warning(f"⏳ 429 for user {user_id}, retry after {retry_after}s "
+                           f"(attempt {attempt}/{NOTIFY_MAX_RETRIES})")
+            notify_limiter.pause(retry_after)
+
+async def notifier(queue):
+    """Sends queued matches for the lifetime of the process, independently of the scanner"""
+    while True:
+        match = await queue.get()
+        try:
+            user_id = match['user_id']
+            await send_notification(user_id, ui.format_notification(match))
+            logger.info(f"✅ Notification sent to user {user_id} for item {match['item_id']}")
+        except Exception as e:
+            logger.error(f"❌ Error sending notification to user {match['user_id']}: {e}")
+        finally:
+            queue.task_done()
+
+async def scan_once(notify_queue):
+    try:
+        items = await parser.get_all_items()
+        logger.info(f"[SCANNER] parser.get_all_items() вернул {len(items)} предметов")
+    except Exception as fetch_exc:
+        logger.error(f"[SCANNER][ERROR] Ошибка при получении предметов через parser.get_all_items: {fetch_exc}", exc_info=True)
+        items = []
+
+    try:
+        # В потоке БД только два батч-запроса; сопоставление идёт в отдельном потоке
+        processed_ids = await db.get_processed_item_ids(ItemFilter.item_ids(items))
+        matches, new_items = await asyncio.to_thread(
+            ItemFilter.match_items, items, search_index, processed_ids
+        )
+        await db.save_items(new_items)
+        logger.info(f"[SCANNER] ItemFilter.match_items нашёл {len(matches)} совпадений")
+    except Exception as filter_exc:
+        logger.error(f"[SCANNER][ERROR] Ошибка при фильтрации: {filter_exc}", exc_info=True)
+        matches = []
+
+    # Рассылкой занимается notifier, следующий скан её не ждёт
+    for match in matches:
+        notify_queue.put_nowait(match)
+    if matches:
+        logger.info(f"📤 Queued {len(matches)} notifications ({notify_queue.qsize()} pending)")
+    else:
+        logger.info("[SCANNER] Нет совпадений для уведомления пользователей.")
+
+async def background_scanner(notify_queue):
+    logger.info("🔄 Async background scanner started")
+    loop = asyncio.get_running_loop()
+    next_start = loop.time()
+    while True:
+        logger.info("=== [SCANNER] NEW CYCLE STARTED ===")
+        try:
+            await scan_once(notify_queue)
+        except Exception as cycle_exc:
+            logger.error(f"[SCANNER][ERROR] НЕОЖИДАННАЯ ОШИБКА в основном цикле: {cycle_exc}", exc_info=True)
+        # Фиксированный период: следующий старт = прошлый старт + SCAN_INTERVAL
+        next_start += SCAN_INTERVAL
+        now = loop.time()
+        if next_start < now:
+            logger.warning(f"[SCANNER] Cycle overran SCAN_INTERVAL by {now - next_start:.1f}s, starting next scan now")
+            next_start = now
+        logger.info(f"=== [SCANNER] END OF CYCLE, next scan in {next_start - now:.0f}s ===")
+        await asyncio.sleep(next_start - now)
+
+# ==================== RUNTIME ====================
+
+async def run_webhook_server(stop_event):
+    full_webhook_url = WEBHOOK_URL.rstrip('/') + '/webhook'
+    await bot.remove_webhook()
+    await bot.set_webhook(url=full_webhook_url)
+    logger.info(f"✅ Webhook set: {full_webhook_url}")
+
+    runner = web.AppRunner(create_web_app())
+    await runner.setup()
+    site = web.TCPSite(runner, host='0.0.0.0', port=PORT)
+    await site.start()
+    logger.info(f"✅ aiohttp server listening on port {PORT}")
+    try:
+        await stop_event.wait()
+    finally:
+        await runner.cleanup()
+
+async def main():
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            # Windows: остаётся KeyboardInterrupt
+            pass
+
+    notify_queue = asyncio.Queue()
+    tasks = []
+    try:
+        await parser.start()
+        if not WEBHOOK_URL:
+            # До запуска задач: ошибка сети/токена сразу уходит в shutdown
+            logger.info("ℹ️ WEBHOOK_URL не задан, используем polling")
+            await bot.remove_webhook()
+
+        tasks.extend(
+            asyncio.create_task(notifier(notify_queue), name=f'notifier-{n}')
+            for n in range(NOTIFY_CONCURRENCY)
+        )
+        scanner_task = asyncio.create_task(background_scanner(notify_queue), name='scanner')
+        if WEBHOOK_URL:
+            updates_task = asyncio.create_task(run_webhook_server(stop_event), name='webhook')
+        else:
+            updates_task = asyncio.create_task(
+                bot.infinity_polling(timeout=30, skip_pending=True), name='polling'
+            )
+        stop_task = asyncio.create_task(stop_event.wait(), name='stop')
+        tasks.extend((scanner_task, updates_task, stop_task))
+
+        done, _ = await asyncio.wait(
+            {scanner_task, updates_task, stop_task}, return_when=asyncio.FIRST_COMPLETED
+        )
+        for task in done:
+            if task is not stop_task and not task.cancelled() and task.exception():
+                logger.error(f"❌ Task {task.get_name()} failed: {task.exception()}", exc_info=task.exception())
+    except Exception as e:
+        logger.error(f"❌ Startup failed: {e}", exc_info=True)
+        raise
+    finally:
+        # ==================== SHUTDOWN ====================
+        logger.info("🛑 Shutting down...")
+        stop_event.set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if not notify_queue.empty():
+            logger.warning(f"⚠️ {notify_queue.qsize()} queued notifications dropped on shutdown")
+        await parser.close()
+        await bot.close_session()
+        db.close()
+        logger.info("✅ Shutdown complete")
+
+if __name__ == '__main__':
+    logger.info("=" * 70)
+    logger.info("🚀 Starting PirateSwap Tracker Bot (asyncio runtime: bot + scanner on one loop)")
+    logger.info("=" * 70)
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+    except Exception:
+        exit(1)
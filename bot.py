@@ -6,7 +6,8 @@ from flask import Flask, request
 from config import BOT_TOKEN, ADMIN_CHAT_ID, DB_NAME
 from database import Database
 from parser import PirateSwapParser
-from filters import ItemFilter
+from filters import ItemFilter, SearchIndex
+import ui
 from config import SCAN_INTERVAL
 import os
 import sys
@@ -44,6 +45,8 @@ logger.info("✅ Telegram bot initialized")
 try:
     db = Database(DB_NAME)
     logger.info("✅ Database initialized")
+    search_index = SearchIndex.from_searches(db.get_all_search_rows())
+    logger.info(f"✅ Search index built: {len(search_index)} searches")
 except Exception as e:
     logger.error(f"❌ Database init failed: {e}")
     exit(1)
@@ -56,18 +59,12 @@ except Exception as e:
     exit(1)
 
 # State management for user conversations
-user_states = {}
+user_states = ui.ConversationState()
 
 PORT = int(os.getenv('PORT', 5000))
 WEBHOOK_URL = os.getenv('WEBHOOK_URL')
 logger.info(f"✅ PORT: {PORT}")
 
-def get_main_keyboard():
-    markup = telebot.types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=False)
-    markup.row('🚀 Старт', '➕ Добавить скин')
-    markup.row('📋 Мои поиски')
-    return markup
-
 @app.route('/health', methods=['GET'])
 def health():
     return {'status': 'ok'}, 200
@@ -91,122 +88,80 @@ def webhook():
 def start_command(message):
     user_id = message.chat.id
     logger.info(f"🔥 /START COMMAND FROM USER {user_id}")
-    welcome_text = (
-        "🎮 <b>PirateSwap Tracker Bot</b>\n\n"
-        "<b>Что делает бот:</b>\n"
-        "🔍 Отслеживает новые скины на pirateswap.com\n"
-        "📢 Отправляет уведомления о найденных скинах\n"
-        "💰 Показывает цену и float значения\n"
-        "🔗 Предоставляет ссылку для осмотра в игре\n\n"
-        "<b>Как начать:</b>\n"
-        "1️⃣ Нажми '<b>➕ Добавить скин</b>'\n"
-        "2️⃣ Введи название скина\n"
-        "3️⃣ Выбери, нужны ли брелоки\n"
-        "4️⃣ Жди уведомления!\n\n"
-        "<b>Как приходят уведомления:</b>\n"
-        "📬 Бот сканирует PirateSwap каждые 5 минут\n"
-        "🎯 При совпадении с твоим поиском ты получишь сообщение\n"
-        "✅ В сообщении будут все данные о скине"
-    )
     try:
-        msg = bot.send_message(user_id, welcome_text, reply_markup=get_main_keyboard())
+        msg = bot.send_message(user_id, ui.WELCOME_TEXT, reply_markup=ui.get_main_keyboard())
         logger.info(f"✅ Start message sent to user {user_id}, message_id: {msg.message_id}")
     except Exception as e:
         logger.error(f"❌ Error sending start message to {user_id}: {e}", exc_info=True)
 
-@bot.message_handler(func=lambda message: message.text == '🚀 Старт')
+@bot.message_handler(func=lambda message: message.text == ui.BTN_START)
 def start_button(message):
     start_command(message)
 
-@bot.message_handler(func=lambda message: message.text == '➕ Добавить скин')
+@bot.message_handler(func=lambda message: message.text == ui.BTN_ADD_SKIN)
 def add_skin_start(message):
     user_id = message.chat.id
     logger.info(f"📌 Add skin button pressed by user {user_id}")
-    user_states[user_id] = {'step': 'waiting_skin_name'}
+    user_states.start_add(user_id)
     try:
-        msg = bot.send_message(
-            user_id,
-            "🎯 <b>Какой скин хотите отслеживать?</b>\n\n"
-            "<i>Введите название или часть названия скина:</i>\n"
-            "Например: <code>AK-47</code> или <code>Dragon Lore</code>",
-            reply_markup=telebot.types.ForceReply()
-        )
+        bot.send_message(user_id, ui.ASK_SKIN_NAME_TEXT, reply_markup=telebot.types.ForceReply())
         logger.info(f"✅ Skin name request sent to user {user_id}")
     except Exception as e:
         logger.error(f"❌ Error requesting skin name from {user_id}: {e}")
-        if user_id in user_states:
-            del user_states[user_id]
+        user_states.reset(user_id)
 
-@bot.message_handler(func=lambda message: message.chat.id in user_states and user_states[message.chat.id].get('step') == 'waiting_skin_name')
+@bot.message_handler(func=lambda message: user_states.is_waiting_skin_name(message.chat.id))
 def process_skin_name(message):
     user_id = message.chat.id
-    skin_name = message.text.strip()
-    logger.info(f"📝 Skin name input from user {user_id}: '{skin_name}', state: {user_states[user_id]}")
-    if not skin_name or len(skin_name) < 2:
+    logger.info(f"📝 Skin name input from user {user_id}: '{message.text}', state: {user_states.get(user_id)}")
+    skin_name = ui.clean_skin_name(message.text)
+    if not skin_name:
         logger.warning(f"❌ Invalid skin name length from {user_id}")
-        bot.send_message(user_id, "❌ Название скина слишком короткое. Пожалуйста, введите минимум 2 символа.")
+        bot.send_message(user_id, ui.SKIN_NAME_TOO_SHORT_TEXT)
         return
-    user_states[user_id]['skin_name'] = skin_name
-    user_states[user_id]['step'] = 'waiting_charm_choice'
-
-    markup = telebot.types.InlineKeyboardMarkup()
-    markup.add(
-        telebot.types.InlineKeyboardButton('✨ Добавить брелок', callback_data='charm_yes'),
-        telebot.types.InlineKeyboardButton('❌ Без брелока', callback_data='charm_no')
-    )
+    user_states.set_skin_name(user_id, skin_name)
     try:
-        msg = bot.send_message(
-            user_id,
-            f"🎨 <b>Нужен брелок для этого скина?</b>\n\n"
-            f"<b>Скин:</b> {skin_name}",
-            reply_markup=markup
-        )
+        bot.send_message(user_id, ui.charm_prompt_text(skin_name), reply_markup=ui.get_charm_keyboard())
         logger.info(f"✅ Charm choice prompt sent to user {user_id}")
     except Exception as e:
         logger.error(f"❌ Error sending charm choice to {user_id}: {e}")
-        if user_id in user_states:
-            del user_states[user_id]
+        user_states.reset(user_id)
 
-@bot.callback_query_handler(func=lambda call: call.data in ['charm_yes', 'charm_no'])
+@bot.callback_query_handler(func=ui.is_charm_callback)
 def process_charm_choice(call):
     user_id = call.message.chat.id
     call_id = call.id
     logger.info(f"📌 Charm choice callback from user {user_id}: {call.data}, state: {user_states.get(user_id)}")
-    if user_id not in user_states or user_states[user_id].get('step') != 'waiting_charm_choice':
+    if not user_states.is_waiting_charm_choice(user_id):
         logger.warning(f"❌ Invalid state for user {user_id}")
-        bot.answer_callback_query(call_id, "❌ Сессия истекла. Начните заново.", show_alert=True)
+        bot.answer_callback_query(call_id, ui.SESSION_EXPIRED_ALERT, show_alert=True)
         return
 
-    charm_required = 1 if call.data == 'charm_yes' else 0
-    skin_name = user_states[user_id]['skin_name']
+    charm_required = ui.parse_charm_choice(call)
+    skin_name = user_states.finish(user_id)
+
+    if search_index.has_subscription(user_id, skin_name, charm_required):
+        logger.warning(f"❌ Equivalent search already exists for user {user_id}: {skin_name}")
+        bot.answer_callback_query(call_id, ui.SEARCH_EXISTS_ALERT, show_alert=True)
+        return
 
     try:
-        added = db.add_search(user_id, skin_name, charm_required)
-        if added:
-            charm_text = "Да ✨" if charm_required else "Нет"
-            confirmation = (
-                f"✅ <b>Поиск добавлен!</b>\n\n"
-                f"<b>Название:</b> {skin_name}\n"
-                f"<b>Брелок:</b> {charm_text}"
+        search_id = db.add_search(user_id, skin_name, charm_required)
+        if search_id:
+            search_index.add(search_id, user_id, skin_name, charm_required)
+            bot.send_message(
+                user_id, ui.search_added_text(skin_name, charm_required), reply_markup=ui.get_main_keyboard()
             )
-            bot.send_message(user_id, confirmation, reply_markup=get_main_keyboard())
             logger.info(f"✅ Search added for user {user_id}: {skin_name} (charm: {charm_required})")
-            bot.answer_callback_query(call_id, "✅ Поиск успешно добавлен!", show_alert=False)
+            bot.answer_callback_query(call_id, ui.SEARCH_ADDED_ALERT, show_alert=False)
         else:
             logger.warning(f"❌ Failed to add search for user {user_id}")
-            bot.answer_callback_query(
-                call_id,
-                "❌ Такой поиск уже существует или произошла ошибка",
-                show_alert=True
-            )
-        del user_states[user_id]
+            bot.answer_callback_query(call_id, ui.SEARCH_EXISTS_ALERT, show_alert=True)
     except Exception as e:
         logger.error(f"❌ Error adding search for {user_id}: {e}", exc_info=True)
-        bot.answer_callback_query(call_id, f"❌ Ошибка: {str(e)}", show_alert=True)
-        if user_id in user_states:
-            del user_states[user_id]
+        bot.answer_callback_query(call_id, ui.error_text(e), show_alert=True)
 
-@bot.message_handler(func=lambda message: message.text == '📋 Мои поиски')
+@bot.message_handler(func=lambda message: message.text == ui.BTN_MY_SEARCHES)
 def show_searches(message):
     user_id = message.chat.id
     logger.info(f"📌 Show searches button pressed by user {user_id}")
@@ -214,88 +169,53 @@ def show_searches(message):
         searches = db.get_user_searches(user_id)
         logger.info(f"📋 Found {len(searches)} searches for user {user_id}")
         if not searches:
-            bot.send_message(
-                user_id,
-                "📭 <b>У вас нет активных поисков.</b>\n\n"
-                "Нажмите '<b>➕ Добавить скин</b>' чтобы начать отслеживание.",
-                reply_markup=get_main_keyboard()
-            )
+            bot.send_message(user_id, ui.NO_SEARCHES_TEXT, reply_markup=ui.get_main_keyboard())
             return
-        response = "📋 <b>Ваши поиски:</b>\n\n"
-        markup = telebot.types.InlineKeyboardMarkup()
-        for search_id, skin_name, charm_required in searches:
-            charm_text = "✨ Брелок: Да" if charm_required else "❌ Брелок: Нет"
-            response += f"• <b>{skin_name}</b> - {charm_text}\n"
-            markup.add(
-                telebot.types.InlineKeyboardButton(
-                    f"🗑 {skin_name}",
-                    callback_data=f"delete_{search_id}"
-                )
-            )
-        msg = bot.send_message(user_id, response, reply_markup=markup)
+        response, markup = ui.format_searches(searches)
+        bot.send_message(user_id, response, reply_markup=markup)
         logger.info(f"✅ Searches list sent to user {user_id}")
     except Exception as e:
         logger.error(f"❌ Error showing searches for {user_id}: {e}", exc_info=True)
-        bot.send_message(user_id, f"❌ Ошибка: {str(e)}")
+        bot.send_message(user_id, ui.error_text(e))
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('delete_'))
+@bot.callback_query_handler(func=ui.is_delete_callback)
 def delete_search(call):
     user_id = call.message.chat.id
     call_id = call.id
     try:
-        search_id = int(call.data.split('_')[1])
+        search_id = ui.parse_delete_id(call)
         logger.info(f"🗑 Delete search request from user {user_id}, search_id: {search_id}")
         if db.delete_search(search_id):
-            bot.answer_callback_query(call_id, "✅ Поиск удалён!", show_alert=False)
-            bot.edit_message_text(
-                "🗑 <b>Поиск удалён</b>",
-                user_id,
-                call.message.message_id
-            )
+            search_index.remove(search_id)
+            bot.answer_callback_query(call_id, ui.SEARCH_DELETED_ALERT, show_alert=False)
+            bot.edit_message_text(ui.SEARCH_DELETED_TEXT, user_id, call.message.message_id)
             logger.info(f"✅ Search {search_id} deleted for user {user_id}")
         else:
             logger.warning(f"❌ Failed to delete search {search_id} for user {user_id}")
-            bot.answer_callback_query(call_id, "❌ Ошибка при удалении", show_alert=True)
+            bot.answer_callback_query(call_id, ui.DELETE_FAILED_ALERT, show_alert=True)
     except Exception as e:
         logger.error(f"❌ Error deleting search: {e}", exc_info=True)
-        bot.answer_callback_query(call_id, f"❌ Ошибка: {str(e)}", show_alert=True)
+        bot.answer_callback_query(call_id, ui.error_text(e), show_alert=True)
 
 @bot.message_handler(func=lambda message: True)
 def default_handler(message):
     user_id = message.chat.id
     if user_id in user_states:
-        logger.info(f"default_handler SKIP: user {user_id} in dialogue: {user_states[user_id]}")
+        logger.info(f"default_handler SKIP: user {user_id} in dialogue: {user_states.get(user_id)}")
         return
     text = message.text
     logger.info(f"📝 Default message from user {user_id}: '{text}'")
     try:
-        bot.send_message(
-            user_id,
-            "👋 Привет! Используйте меню внизу для работы с ботом.",
-            reply_markup=get_main_keyboard()
-        )
+        bot.send_message(user_id, ui.DEFAULT_TEXT, reply_markup=ui.get_main_keyboard())
     except Exception as e:
         logger.error(f"❌ Error in default handler: {e}")
 
-def format_notification(match):
-    has_keychains_text = "Да ✨" if match['has_keychains'] else "Нет"
-    message = (
-        f"🎉 <b>Найден скин!</b>\n\n"
-        f"<b>Название:</b> {match['market_hash_name']}\n"
-        f"<b>Цена:</b> ${match['price']}\n"
-        f"<b>Float:</b> {match['float']:.6f}\n"
-        f"<b>Брелоки:</b> {has_keychains_text}\n\n"
-    )
-    if match.get('inspect_link'):
-        message += f"<b>Inspect:</b> <a href='{match['inspect_link']}'>Осмотреть в игре</a>"
-    return message
-
 def send_notifications(matches):
     logger.info(f"📤 Sending {len(matches)} notifications...")
     for match in matches:
         try:
             user_id = match['user_id']
-            notification = format_notification(match)
+            notification = ui.format_notification(match)
             bot.send_message(user_id, notification)
             logger.info(f"✅ Notification sent to user {user_id} for item {match['item_id']}")
         except Exception as e:
@@ -316,16 +236,7 @@ def background_scanner():
                 items = []
 
             try:
-                user_searches = db.get_all_searches()
-                logger.info(f"[SCANNER] db.get_all_searches() вернул {len(user_searches)} поисков")
-                for idx, search in enumerate(user_searches):
-                    logger.info(f"[SCANNER] SEARCH {idx+1}: {search}")
-            except Exception as filter_exc:
-                logger.error(f"[SCANNER][ERROR] Ошибка при получении поисков пользователей: {filter_exc}", exc_info=True)
-                user_searches = []
-
-            try:
-                matches = ItemFilter.filter_items(items, user_searches, db)
+                matches = ItemFilter.filter_items(items, search_index, db)
                 logger.info(f"[SCANNER] ItemFilter.filter_items нашёл {len(matches)} совпадений")
                 for idx, match in enumerate(matches):
                     logger.info(f"[SCANNER] MATCH {idx+1}: {match}")
@@ -13,5 +13,9 @@ SCAN_INTERVAL = 300  # 5 minutes in seconds
 PAGES_TO_SCAN = 2
 RESULTS_PER_PAGE = 50
 
+# Telegram notifications (Telegram allows ~30 msg/s per bot)
+NOTIFY_RATE_LIMIT = 25  # messages per second
+NOTIFY_MAX_RETRIES = 5
+
 # Database Configuration
 DB_NAME = 'pirateswap_tracker.db'
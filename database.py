@@ -1,5 +1,7 @@
+import asyncio
 import sqlite3
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from config import DB_NAME
 
 logger = logging.getLogger(__name__)
@@ -50,7 +52,7 @@ class Database:
             raise
     
     def add_search(self, user_id, skin_name, charm_required):
-        """Add user search"""
+        """Add user search, returns the new search id (False on failure)"""
         try:
             conn = sqlite3.connect(self.db_file)
             cursor = conn.cursor()
@@ -58,10 +60,11 @@ class Database:
                 INSERT INTO user_searches (user_id, skin_name, charm_required)
                 VALUES (?, ?, ?)
             ''', (user_id, skin_name, charm_required))
+            search_id = cursor.lastrowid
             conn.commit()
             conn.close()
             logger.info(f"✅ Search added: {skin_name}")
-            return True
+            return search_id
         except sqlite3.IntegrityError:
             logger.warning(f"⚠️ Search already exists: {skin_name}")
             return False
@@ -99,45 +102,92 @@ class Database:
             logger.error(f"❌ Error getting searches: {e}")
             return []
     
-    def get_all_searches(self):
-        """Get all searches from all users"""
+    def get_all_search_rows(self):
+        """Get all searches with ids, for building SearchIndex.
+
+        Raises on failure: the index is the only in-memory copy of the
+        subscriptions, so an empty result must not be mistaken for "no searches".
+        """
+        conn = sqlite3.connect(self.db_file)
         try:
-            conn = sqlite3.connect(self.db_file)
             cursor = conn.cursor()
-            cursor.execute('SELECT user_id, skin_name, charm_required FROM user_searches')
-            searches = cursor.fetchall()
+            cursor.execute('SELECT id, user_id, skin_name, charm_required FROM user_searches')
+            return cursor.fetchall()
+        finally:
             conn.close()
-            return searches
-        except Exception as e:
-            logger.error(f"❌ Error getting all searches: {e}")
-            return []
     
-    def item_exists(self, item_id):
-        """Check if item already processed"""
+    def get_processed_item_ids(self, item_ids):
+        """Return the subset of item_ids that were already processed (one query per chunk)"""
+        item_ids = list(item_ids)
+        processed = set()
         try:
             conn = sqlite3.connect(self.db_file)
             cursor = conn.cursor()
-            cursor.execute('SELECT 1 FROM processed_items WHERE item_id = ?', (item_id,))
-            exists = cursor.fetchone() is not None
+            # SQLite ограничивает число параметров в запросе
+            for start in range(0, len(item_ids), 500):
+                chunk = item_ids[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                cursor.execute(
+                    f'SELECT item_id FROM processed_items WHERE item_id IN ({placeholders})',
+                    chunk
+                )
+                processed.update(row[0] for row in cursor.fetchall())
             conn.close()
-            return exists
+            return processed
         except Exception as e:
-            logger.error(f"❌ Error checking item: {e}")
-            return False
+            logger.error(f"❌ Error checking items: {e}")
+            return processed
     
-    def save_item(self, item_id, market_hash_name, price, float_value, keychains_count, inspect_link):
-        """Save processed item"""
+    def save_items(self, items):
+        """Save processed items: (item_id, market_hash_name, price, float_value, keychains_count, inspect_link) rows"""
+        if not items:
+            return True
         try:
             conn = sqlite3.connect(self.db_file)
             cursor = conn.cursor()
-            cursor.execute('''
+            cursor.executemany('''
                 INSERT OR IGNORE INTO processed_items 
                 (item_id, market_hash_name, price, float_value, keychains_count, inspect_link)
                 VALUES (?, ?, ?, ?, ?, ?)
-            ''', (item_id, market_hash_name, price, float_value, keychains_count, inspect_link))
+            ''', items)
             conn.commit()
             conn.close()
             return True
         except Exception as e:
-            logger.error(f"❌ Error saving item: {e}")
+            logger.error(f"❌ Error saving items: {e}")
             return False
+
+class AsyncDatabase:
+    """Awaitable wrapper around Database for the asyncio runtime.
+
+    sqlite3 calls run on a single worker thread, so they never block the
+    event loop and writes stay serialized.
+    """
+
+    def __init__(self, db_file):
+        self.db = Database(db_file)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sqlite')
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def add_search(self, user_id, skin_name, charm_required):
+        return await self._run(self.db.add_search, user_id, skin_name, charm_required)
+
+    async def delete_search(self, search_id):
+        return await self._run(self.db.delete_search, search_id)
+
+    async def get_user_searches(self, user_id):
+        return await self._run(self.db.get_user_searches, user_id)
+
+    async def get_processed_item_ids(self, item_ids):
+        return await self._run(self.db.get_processed_item_ids, item_ids)
+
+    async def save_items(self, items):
+        return await self._run(self.db.save_items, items)
+
+    def close(self):
+        """Wait for pending queries and stop the DB thread"""
+        self.executor.shutdown(wait=True)
+        logger.info("✅ Database executor stopped")
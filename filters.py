@@ -1,4 +1,5 @@
 import logging
+import threading
 import unicodedata
 import re
 
@@ -18,16 +19,74 @@ def normalize(s):
     s = s.strip()
     return s
 
-class ItemFilter:
+class SearchIndex:
+    """Subscriptions grouped by canonical query: (normalized skin name, charm flag).
+
+    Each distinct query is matched once per item and the result is fanned out
+    to all its subscribers. Kept up to date via add()/remove() as users add and
+    delete searches; safe to use from the scanner and handlers concurrently.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._groups = {}  # (normalized name, charm) -> {search_id: user_id}
+        self._keys = {}    # search_id -> (normalized name, charm)
+
     @staticmethod
-    def check_name_match(user_text, market_hash_name):
-        n_user = normalize(user_text)
-        n_name = normalize(market_hash_name)
-        result = n_user in n_name
-        logger.info(f"[FILTER][COMPARE]\nuser = {repr(user_text)} → {repr(n_user)}"
-                    f"\nitem = {repr(market_hash_name)} → {repr(n_name)}\nresult = {result}")
-        return result
+    def canonical_key(skin_name, charm_required):
+        return normalize(skin_name), 1 if charm_required else 0
+
+    @classmethod
+    def from_searches(cls, searches):
+        """Build from (search_id, user_id, skin_name, charm_required) rows"""
+        index = cls()
+        for search_id, user_id, skin_name, charm_required in searches:
+            index.add(search_id, user_id, skin_name, charm_required)
+        return index
+
+    def add(self, search_id, user_id, skin_name, charm_required):
+        key = self.canonical_key(skin_name, charm_required)
+        with self._lock:
+            self._remove_locked(search_id)
+            self._groups.setdefault(key, {})[search_id] = user_id
+            self._keys[search_id] = key
+
+    def remove(self, search_id):
+        with self._lock:
+            self._remove_locked(search_id)
+
+    def _remove_locked(self, search_id):
+        key = self._keys.pop(search_id, None)
+        if key is None:
+            return
+        subscribers = self._groups[key]
+        subscribers.pop(search_id, None)
+        if not subscribers:
+            del self._groups[key]
+
+    def has_subscription(self, user_id, skin_name, charm_required):
+        """True if the user already has a search with the same canonical key"""
+        key = self.canonical_key(skin_name, charm_required)
+        with self._lock:
+            return user_id in self._groups.get(key, {}).values()
 
+    def groups(self):
+        """Snapshot: list of (normalized name, charm_required, [user_id, ...])
+
+        Each user appears once per group, even with several equivalent searches.
+        """
+        with self._lock:
+            return [
+                (name, charm_required, list(dict.fromkeys(subscribers.values())))
+                for (name, charm_required), subscribers in self._groups.items()
+            ]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._keys)
+
+
+class ItemFilter:
     @staticmethod
     def check_keychain_requirement(charm_required, item_keychains):
         # Безопасно: если нет поля, если None, всегда []!
@@ -39,9 +98,22 @@ class ItemFilter:
         return result
 
     @staticmethod
-    def filter_items(items, user_searches, db):
+    def item_ids(items):
+        return [str(item.get('id')) for item in items]
+
+    @staticmethod
+    def match_items(items, search_index, processed_ids):
+        """Match items against the SearchIndex without touching the DB.
+
+        Returns (matches, new_items): notifications to send and rows for
+        Database.save_items for every item somebody wanted.
+        """
+        groups = search_index.groups()
+        seen_ids = set(processed_ids)
         matches = []
-        logger.info(f"[FILTER] Starting filter_items: {len(items)} items, {len(user_searches)} searches")
+        new_items = []
+        logger.info(f"[FILTER] Starting match_items: {len(items)} items, "
+                    f"{len(search_index)} searches in {len(groups)} distinct queries")
 
         for item in items:
             try:
@@ -52,40 +124,48 @@ class ItemFilter:
                 keychains = item.get('keyChains') or []
                 inspect_link = item.get('inspectInGameLink', '')
 
-                # Проверка дубликата в БД
-                if db.item_exists(item_id):
+                # Проверка дубликата (уже в БД или повтор в этом же скане)
+                if item_id in seen_ids:
                     logger.info(f"[FILTER] Already processed item_id {item_id}, skipping.")
                     continue
 
-                # Ищем среди всех поисков
+                n_name = normalize(market_hash_name)
+                # Каждый уникальный запрос проверяем один раз, результат раздаём подписчикам
                 match_found = False
-                for user_id, skin_name, charm_required in user_searches:
-                    logger.info(f"[FILTER] Checking item '{market_hash_name}' (id={item_id}) "
-                                f"for user {user_id}, search='{skin_name}', charm={charm_required}")
-
-                    if ItemFilter.check_name_match(skin_name, market_hash_name):
-                        if ItemFilter.check_keychain_requirement(charm_required, keychains):
-                            logger.info(f"[FILTER] === MATCHED: '{market_hash_name}' for user {user_id}")
-                            matches.append({
-                                'user_id': user_id,
-                                'item_id': item_id,
-                                'market_hash_name': market_hash_name,
-                                'price': price,
-                                'float': float_val,
-                                'has_keychains': len(keychains) > 0,
-                                'keychains': keychains,
-                                'inspect_link': inspect_link
-                            })
-                            match_found = True
-                        else:
-                            logger.info("[FILTER] No keychain match")
-                    else:
-                        logger.info("[FILTER] Name not matched")
+                for n_query, charm_required, subscribers in groups:
+                    if n_query not in n_name:
+                        continue
+                    if not ItemFilter.check_keychain_requirement(charm_required, keychains):
+                        continue
+                    logger.info(f"[FILTER] === MATCHED: '{market_hash_name}' (id={item_id}) "
+                                f"query={repr(n_query)}, charm={charm_required}, users={len(subscribers)}")
+                    logger.debug(f"[FILTER] Subscribers for {repr(n_query)}: {subscribers}")
+                    for user_id in subscribers:
+                        matches.append({
+                            'user_id': user_id,
+                            'item_id': item_id,
+                            'market_hash_name': market_hash_name,
+                            'price': price,
+                            'float': float_val,
+                            'has_keychains': len(keychains) > 0,
+                            'keychains': keychains,
+                            'inspect_link': inspect_link
+                        })
+                    match_found = True
                 # ТОЛЬКО если кто-то действительно хочет такой предмет — сохраняем в БД!
                 if match_found:
-                    db.save_item(item_id, market_hash_name, price, float_val, len(keychains), inspect_link)
+                    seen_ids.add(item_id)
+                    new_items.append((item_id, market_hash_name, price, float_val, len(keychains), inspect_link))
             except Exception as e:
                 logger.error(f"❌ Error filtering item: {e}", exc_info=True)
                 continue
         logger.info(f"[FILTER] Total matches found: {len(matches)}")
+        return matches, new_items
+
+    @staticmethod
+    def filter_items(items, search_index, db):
+        """Synchronous scan step: one batched lookup, in-memory matching, one batched insert"""
+        processed_ids = db.get_processed_item_ids(ItemFilter.item_ids(items))
+        matches, new_items = ItemFilter.match_items(items, search_index, processed_ids)
+        db.save_items(new_items)
         return matches
@@ -1,4 +1,6 @@
+import asyncio
 import requests
+import aiohttp
 import logging
 from config import PIRATESWAP_API, PAGES_TO_SCAN, RESULTS_PER_PAGE
 
@@ -60,3 +62,73 @@ class PirateSwapParser:
         
         logger.info(f"📊 Total items fetched: {len(all_items)}")
         return all_items
+
+
+class AsyncPirateSwapParser:
+    """aiohttp-based parser for the asyncio runtime (see async_bot.py)"""
+
+    def __init__(self):
+        self.api_url = PIRATESWAP_API
+        self.timeout = 10
+        self.max_retries = 3
+        self.session = None
+
+    async def start(self):
+        """Open the shared HTTP session"""
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'User-Agent': 'Mozilla/5.0'}
+            )
+
+    async def close(self):
+        """Close the shared HTTP session"""
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    async def fetch_inventory(self, page):
+        """Fetch inventory page from PirateSwap API"""
+        await self.start()
+        params = {
+            'page': page,
+            'results': RESULTS_PER_PAGE,
+            'orderBy': 'price',
+            'sortOrder': 'desc'
+        }
+
+        for attempt in range(self.max_retries):
+            try:
+                async with self.session.get(self.api_url, params=params) as response:
+                    response.raise_for_status()
+                    data = await response.json(content_type=None)
+
+                if 'data' in data and isinstance(data['data'], list):
+                    logger.info(f"✅ Fetched page {page} with {len(data['data'])} items")
+                    return data['data']
+                else:
+                    logger.warning(f"⚠️ Unexpected response format on page {page}")
+                    return []
+
+            except asyncio.TimeoutError:
+                logger.warning(f"⏱️ Timeout on page {page}, attempt {attempt + 1}/{self.max_retries}")
+            except aiohttp.ClientConnectionError:
+                logger.warning(f"🔗 Connection error on page {page}, attempt {attempt + 1}/{self.max_retries}")
+            except aiohttp.ClientResponseError as e:
+                logger.error(f"❌ HTTP error on page {page}: {e}")
+                break
+            except Exception as e:
+                logger.error(f"❌ Error parsing page {page}: {e}")
+                break
+
+        return []
+
+    async def get_all_items(self):
+        """Fetch items from all pages concurrently"""
+        pages = await asyncio.gather(
+            *(self.fetch_inventory(page) for page in range(1, PAGES_TO_SCAN + 1))
+        )
+        all_items = [item for items in pages for item in items]
+
+        logger.info(f"📊 Total items fetched: {len(all_items)}")
+        return all_items
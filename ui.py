@@ -0,0 +1,176 @@
+import telebot
+
+# ==================== BUTTONS ====================
+BTN_START = '🚀 Старт'
+BTN_ADD_SKIN = '➕ Добавить скин'
+BTN_MY_SEARCHES = '📋 Мои поиски'
+
+CHARM_YES = 'charm_yes'
+CHARM_NO = 'charm_no'
+DELETE_PREFIX = 'delete_'
+
+MIN_SKIN_NAME_LENGTH = 2
+
+# ==================== TEXTS ====================
+WELCOME_TEXT = (
+    "🎮 <b>PirateSwap Tracker Bot</b>\n\n"
+    "<b>Что делает бот:</b>\n"
+    "🔍 Отслеживает новые скины на pirateswap.com\n"
+    "📢 Отправляет уведомления о найденных скинах\n"
+    "💰 Показывает цену и float значения\n"
+    "🔗 Предоставляет ссылку для осмотра в игре\n\n"
+    "<b>Как начать:</b>\n"
+    "1️⃣ Нажми '<b>➕ Добавить скин</b>'\n"
+    "2️⃣ Введи название скина\n"
+    "3️⃣ Выбери, нужны ли брелоки\n"
+    "4️⃣ Жди уведомления!\n\n"
+    "<b>Как приходят уведомления:</b>\n"
+    "📬 Бот сканирует PirateSwap каждые 5 минут\n"
+    "🎯 При совпадении с твоим поиском ты получишь сообщение\n"
+    "✅ В сообщении будут все данные о скине"
+)
+ASK_SKIN_NAME_TEXT = (
+    "🎯 <b>Какой скин хотите отслеживать?</b>\n\n"
+    "<i>Введите название или часть названия скина:</i>\n"
+    "Например: <code>AK-47</code> или <code>Dragon Lore</code>"
+)
+SKIN_NAME_TOO_SHORT_TEXT = "❌ Название скина слишком короткое. Пожалуйста, введите минимум 2 символа."
+SESSION_EXPIRED_ALERT = "❌ Сессия истекла. Начните заново."
+SEARCH_ADDED_ALERT = "✅ Поиск успешно добавлен!"
+SEARCH_EXISTS_ALERT = "❌ Такой поиск уже существует или произошла ошибка"
+NO_SEARCHES_TEXT = (
+    "📭 <b>У вас нет активных поисков.</b>\n\n"
+    "Нажмите '<b>➕ Добавить скин</b>' чтобы начать отслеживание."
+)
+SEARCH_DELETED_ALERT = "✅ Поиск удалён!"
+SEARCH_DELETED_TEXT = "🗑 <b>Поиск удалён</b>"
+DELETE_FAILED_ALERT = "❌ Ошибка при удалении"
+DEFAULT_TEXT = "👋 Привет! Используйте меню внизу для работы с ботом."
+
+
+def error_text(e):
+    return f"❌ Ошибка: {str(e)}"
+
+
+def charm_prompt_text(skin_name):
+    return (
+        f"🎨 <b>Нужен брелок для этого скина?</b>\n\n"
+        f"<b>Скин:</b> {skin_name}"
+    )
+
+
+def search_added_text(skin_name, charm_required):
+    charm_text = "Да ✨" if charm_required else "Нет"
+    return (
+        f"✅ <b>Поиск добавлен!</b>\n\n"
+        f"<b>Название:</b> {skin_name}\n"
+        f"<b>Брелок:</b> {charm_text}"
+    )
+
+
+def format_notification(match):
+    has_keychains_text = "Да ✨" if match['has_keychains'] else "Нет"
+    message = (
+        f"🎉 <b>Найден скин!</b>\n\n"
+        f"<b>Название:</b> {match['market_hash_name']}\n"
+        f"<b>Цена:</b> ${match['price']}\n"
+        f"<b>Float:</b> {match['float']:.6f}\n"
+        f"<b>Брелоки:</b> {has_keychains_text}\n\n"
+    )
+    if match.get('inspect_link'):
+        message += f"<b>Inspect:</b> <a href='{match['inspect_link']}'>Осмотреть в игре</a>"
+    return message
+
+# ==================== KEYBOARDS ====================
+
+def get_main_keyboard():
+    markup = telebot.types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=False)
+    markup.row(BTN_START, BTN_ADD_SKIN)
+    markup.row(BTN_MY_SEARCHES)
+    return markup
+
+
+def get_charm_keyboard():
+    markup = telebot.types.InlineKeyboardMarkup()
+    markup.add(
+        telebot.types.InlineKeyboardButton('✨ Добавить брелок', callback_data=CHARM_YES),
+        telebot.types.InlineKeyboardButton('❌ Без брелока', callback_data=CHARM_NO)
+    )
+    return markup
+
+
+def format_searches(searches):
+    """Text and delete keyboard for the user's (search_id, skin_name, charm_required) rows"""
+    response = "📋 <b>Ваши поиски:</b>\n\n"
+    markup = telebot.types.InlineKeyboardMarkup()
+    for search_id, skin_name, charm_required in searches:
+        charm_text = "✨ Брелок: Да" if charm_required else "❌ Брелок: Нет"
+        response += f"• <b>{skin_name}</b> - {charm_text}\n"
+        markup.add(
+            telebot.types.InlineKeyboardButton(
+                f"🗑 {skin_name}",
+                callback_data=f"{DELETE_PREFIX}{search_id}"
+            )
+        )
+    return response, markup
+
+# ==================== CALLBACK DATA ====================
+
+def is_charm_callback(call):
+    return call.data in (CHARM_YES, CHARM_NO)
+
+
+def parse_charm_choice(call):
+    return 1 if call.data == CHARM_YES else 0
+
+
+def is_delete_callback(call):
+    return call.data.startswith(DELETE_PREFIX)
+
+
+def parse_delete_id(call):
+    return int(call.data[len(DELETE_PREFIX):])
+
+
+def clean_skin_name(text):
+    """Stripped skin name, or None if it is too short"""
+    skin_name = (text or '').strip()
+    if len(skin_name) < MIN_SKIN_NAME_LENGTH:
+        return None
+    return skin_name
+
+# ==================== CONVERSATION STATE ====================
+
+class ConversationState:
+    """Per-chat dialogue for adding a search: skin name -> charm choice"""
+
+    WAITING_SKIN_NAME = 'waiting_skin_name'
+    WAITING_CHARM_CHOICE = 'waiting_charm_choice'
+
+    def __init__(self):
+        self.states = {}
+
+    def __contains__(self, user_id):
+        return user_id in self.states
+
+    def get(self, user_id):
+        return self.states.get(user_id)
+
+    def start_add(self, user_id):
+        self.states[user_id] = {'step': self.WAITING_SKIN_NAME}
+
+    def is_waiting_skin_name(self, user_id):
+        return self.states.get(user_id, {}).get('step') == self.WAITING_SKIN_NAME
+
+    def is_waiting_charm_choice(self, user_id):
+        return self.states.get(user_id, {}).get('step') == self.WAITING_CHARM_CHOICE
+
+    def set_skin_name(self, user_id, skin_name):
+        self.states[user_id] = {'step': self.WAITING_CHARM_CHOICE, 'skin_name': skin_name}
+
+    def finish(self, user_id):
+        """Drop the dialogue and return the chosen skin name"""
+        return self.states.pop(user_id)['skin_name']
+
+    def reset(self, user_id):
+        self.states.pop(user_id, None)